@@ -7,18 +7,24 @@ Description:  Flask web server for the disease diagnosis system.
 """
 
 import os
+import json
 import logging
-from flask import Flask, jsonify, request
+from functools import lru_cache
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from .model.predict import (
     load_model_and_metadata,
-    predict_top_k_from_json,
+    build_platt_constants,
+    build_kernel_constants,
+    predict_top_k,
     calculate_symptom_contributions
 )
+from .model.encoding import normalize_symptom, resolve_symptoms
 
 
 # Configuration
 TOP_K_PREDICTIONS = 5
+PREDICTION_CACHE_SIZE = 1024
 
 # Initialize a flask app
 app = Flask(__name__)
@@ -30,12 +36,24 @@ logger = logging.getLogger(__name__)
 
 # Global model variables - Load model and related data once at startup
 try:
-    model, feature_map, severity_dict = load_model_and_metadata()
+    # Request-independent lookups are precomputed at training time
+    (
+        model,
+        feature_map,
+        severity_dict,
+        FEATURE_WEIGHTS,
+        FEATURE_TO_IDX
+    ) = load_model_and_metadata()
+    PLATT_CONSTANTS = build_platt_constants(model)
+    KERNEL_CONSTANTS = build_kernel_constants(model)
     logger.info("Model and metadata loaded successfully.")
 except Exception as e:
     logger.error(f"Failed to load model: {e}")
     raise e
 
+# The symptom list never changes at runtime, so serialize it once
+_SYMPTOMS_JSON = json.dumps({"symptoms": list(severity_dict.keys())})
+
 
 @app.route("/")
 def home():
@@ -51,9 +69,49 @@ def get_symptoms():
     Returns: 
         Response: JSON object containing list of symptom strings.
     """
-    symptoms = list(severity_dict.keys())
-    return jsonify({"symptoms": symptoms}), 200
+    return Response(_SYMPTOMS_JSON, status=200, mimetype='application/json')
+
+
+
+@lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _compute(symptoms_key):
+    """
+    Runs the full inference flow for one symptom set.
+
+    Cached because the UI often re-submits a set it has already seen
+    (toggling a symptom off and back on).
 
+    Args:
+        symptoms_key (tuple): Sorted, de-duplicated, normalized symptom names.
+
+    Returns:
+        tuple: (predictions, contributions) keyed by the normalized names.
+        These objects are shared by every cache hit; callers must copy them
+        rather than modify them.
+    """
+    # Resolve the symptoms once; both steps below share the same arrays
+    symptoms, indices, weights = resolve_symptoms(symptoms_key, FEATURE_TO_IDX, FEATURE_WEIGHTS)
+
+    # Generate predictions in one clean flow with the model
+    predictions = predict_top_k(
+        model,
+        indices,
+        weights,
+        TOP_K_PREDICTIONS
+    )
+
+    # Generate symptom contributions for each disease prediction
+    contributions = calculate_symptom_contributions(
+        model,
+        symptoms,
+        indices,
+        weights,
+        predictions,
+        PLATT_CONSTANTS,
+        KERNEL_CONSTANTS
+    )
+
+    return predictions, contributions
 
 
 @app.route('/predict', methods=['POST'])
@@ -69,23 +127,24 @@ def predict():
         return jsonify({'error': 'Symptoms must be a non-empty list'}), 400
     
     try:
-        # Generate predictions in one clean flow with the model
-        predictions = predict_top_k_from_json(
-            model,
-            data,
-            feature_map,
-            severity_dict,
-            TOP_K_PREDICTIONS
-        )
-
-        # Generate symptom contributions for each disease prediction
-        contributions = calculate_symptom_contributions(
-            model,
-            data,
-            predictions,
-            feature_map,
-            severity_dict
-        )
+        # Equivalent symptom sets share one cache entry
+        clean_symptoms = {symptom: normalize_symptom(symptom) for symptom in symptoms}
+        predictions, contributions = _compute(tuple(sorted(set(clean_symptoms.values()))))
+
+        # Build the response from fresh objects so nothing downstream can
+        # modify the cached results
+        predictions = [dict(pred) for pred in predictions]
+
+        # Report contributions under the symptom names as submitted; symptoms
+        # the model does not know contribute nothing
+        contributions = {
+            disease: {
+                symptom: dict(scores.get(clean, {'raw': 0.0, 'scaled': 0.0}))
+                for symptom, clean in clean_symptoms.items()
+                if clean
+            }
+            for disease, scores in contributions.items()
+        }
 
         # Return predictions as JSON
         return jsonify({
@@ -0,0 +1,192 @@
+"""
+File:         _kernels.py
+Author:       Noemie Florant
+Description:  Numba-compiled numeric kernels for the inference hot path.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def score_impacts(baseline_probs, batch_probs, disease_idx, weights):
+    """
+    Scores the leave-one-out impact of each symptom on each predicted disease.
+
+    Args:
+        baseline_probs (np.ndarray): Class probabilities with ALL symptoms present.
+        batch_probs (np.ndarray): predict_proba output where row s+1 has symptom s muted.
+        disease_idx (np.ndarray): Class indices of the predicted diseases.
+        weights (np.ndarray): Severity weight of each symptom.
+
+    Returns:
+        tuple: (raw, scaled) arrays of shape (n_diseases, n_symptoms), where
+        'scaled' expresses each raw impact as a percentage of the highest one.
+    """
+    n_d = disease_idx.shape[0]
+    n_s = weights.shape[0]
+    raw = np.zeros((n_d, n_s))
+    scaled = np.zeros((n_d, n_s))
+
+    # Impact: Difference in probability * severity weight, tracking the
+    # highest impact score as the 100% reference point in the same pass
+    hi = 0.0
+    for d in range(n_d):
+        d_idx = disease_idx[d]
+        for s in range(n_s):
+            prob_drop = baseline_probs[d_idx] - batch_probs[s + 1, d_idx]
+            raw[d, s] = max(0.0, prob_drop) * weights[s]
+            if raw[d, s] > hi:
+                hi = raw[d, s]
+
+    # Scale over the flat, contiguous buffers so the loop vectorizes
+    if hi > 0:
+        inv_hi = 100.0 / hi
+        raw_flat = raw.ravel()
+        scaled_flat = scaled.ravel()
+        for i in range(raw_flat.size):
+            scaled_flat[i] = raw_flat[i] * inv_hi
+    return raw, scaled
+
+
+@njit(cache=True, fastmath=True)
+def rbf_loo_decisions(baseline, muted_idx, support_vectors, dual_coef, intercept, sv_starts, gamma):
+    """
+    One-vs-one decision values of an RBF SVC for a baseline vector and for
+    each of its leave-one-out variants.
+
+    Muting a symptom changes a single feature, so each variant's squared
+    distance to a support vector is the baseline distance plus a delta for
+    that feature alone, instead of a full re-evaluation over every feature.
+
+    Args:
+        baseline (np.ndarray): Encoded feature vector with ALL symptoms present.
+        muted_idx (np.ndarray): Feature index muted (set to 0) in each variant.
+        support_vectors (np.ndarray): SVC support vectors, grouped by class.
+        dual_coef (np.ndarray): SVC dual coefficients, shape (n_classes - 1, n_SV).
+        intercept (np.ndarray): Intercept of each one-vs-one pair.
+        sv_starts (np.ndarray): Offset of each class's support vectors, plus the total.
+        gamma (float): RBF kernel coefficient.
+
+    Returns:
+        np.ndarray: Decision values of shape (n_symptoms + 1, n_pairs), where
+        row 0 is the baseline and row s+1 has symptom s muted.
+    """
+    n_sv = support_vectors.shape[0]
+    n_f = support_vectors.shape[1]
+    n_sym = muted_idx.shape[0]
+    n_classes = sv_starts.shape[0] - 1
+    n_pairs = intercept.shape[0]
+
+    # Squared distance from the baseline to every support vector, computed once
+    base_sq = np.zeros(n_sv)
+    for v in range(n_sv):
+        acc = 0.0
+        for f in range(n_f):
+            diff = baseline[f] - support_vectors[v, f]
+            acc += diff * diff
+        base_sq[v] = acc
+
+    dec = np.empty((n_sym + 1, n_pairs))
+    for row in range(n_sym + 1):
+        kvalue = np.empty(n_sv)
+        if row == 0:
+            for v in range(n_sv):
+                kvalue[v] = np.exp(-gamma * base_sq[v])
+        else:
+            # Muting feature f turns its term (w - sv)^2 into sv^2
+            f = muted_idx[row - 1]
+            w = baseline[f]
+            for v in range(n_sv):
+                sq = base_sq[v] - w * (w - 2.0 * support_vectors[v, f])
+                kvalue[v] = np.exp(-gamma * sq)
+
+        # libsvm's pairwise decision function over the class-grouped SVs
+        pair = 0
+        for i in range(n_classes):
+            for j in range(i + 1, n_classes):
+                acc = 0.0
+                for v in range(sv_starts[i], sv_starts[i + 1]):
+                    acc += dual_coef[j - 1, v] * kvalue[v]
+                for v in range(sv_starts[j], sv_starts[j + 1]):
+                    acc += dual_coef[i, v] * kvalue[v]
+                dec[row, pair] = acc + intercept[pair]
+                pair += 1
+
+    return dec
+
+
+@njit(cache=True)
+def _couple_pairwise(r, p):
+    """
+    Solves for class probabilities from pairwise probabilities 'r' in place
+    into 'p' (method 2 of Wu, Lin and Weng, mirroring libsvm).
+    """
+    k = p.shape[0]
+    max_iter = max(100, k)
+    eps = 0.005 / k
+    Q = np.zeros((k, k))
+    Qp = np.zeros(k)
+
+    for t in range(k):
+        p[t] = 1.0 / k
+        for j in range(t):
+            Q[t, t] += r[j, t] * r[j, t]
+            Q[t, j] = Q[j, t]
+        for j in range(t + 1, k):
+            Q[t, t] += r[j, t] * r[j, t]
+            Q[t, j] = -r[j, t] * r[t, j]
+
+    for _ in range(max_iter):
+        # Stopping condition, recalculate Qp and pQp for numerical accuracy
+        pQp = 0.0
+        for t in range(k):
+            Qp[t] = 0.0
+            for j in range(k):
+                Qp[t] += Q[t, j] * p[j]
+            pQp += p[t] * Qp[t]
+        max_error = 0.0
+        for t in range(k):
+            error = abs(Qp[t] - pQp)
+            if error > max_error:
+                max_error = error
+        if max_error < eps:
+            break
+
+        for t in range(k):
+            diff = (-Qp[t] + pQp) / Q[t, t]
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q[t, t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            for j in range(k):
+                Qp[j] = (Qp[j] + diff * Q[t, j]) / (1 + diff)
+                p[j] /= (1 + diff)
+
+
+@njit(cache=True)
+def couple_probabilities(pairwise, pair_i, pair_j, n_classes):
+    """
+    Converts pairwise class probabilities into per-class probabilities.
+
+    Args:
+        pairwise (np.ndarray): Clipped Platt probabilities of shape (n_rows, n_pairs),
+            where column p is P(class pair_i[p] over class pair_j[p]).
+        pair_i (np.ndarray): First class index of each one-vs-one pair.
+        pair_j (np.ndarray): Second class index of each one-vs-one pair.
+        n_classes (int): Number of classes the SVC was trained on.
+
+    Returns:
+        np.ndarray: Probabilities of shape (n_rows, n_classes), matching
+        SVC.predict_proba.
+    """
+    n_rows = pairwise.shape[0]
+    n_pairs = pairwise.shape[1]
+    probs = np.zeros((n_rows, n_classes))
+    r = np.zeros((n_classes, n_classes))
+
+    for row in range(n_rows):
+        for pair in range(n_pairs):
+            r[pair_i[pair], pair_j[pair]] = pairwise[row, pair]
+            r[pair_j[pair], pair_i[pair]] = 1 - pairwise[row, pair]
+        _couple_pairwise(r, probs[row])
+
+    return probs
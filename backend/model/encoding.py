@@ -5,7 +5,19 @@ Description:  Utility functions for transforming raw symptom text into
               numerical vectors for ML model inference.
 """
 import numpy as np
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Tuple
+
+def normalize_symptom(symptom: str) -> str:
+    """Standardizes symptom strings for consistency across datasets."""
+    if not isinstance(symptom, str):
+        return ""
+    return (
+        symptom.strip()
+        .lower()
+        .replace(" ", "_")
+        .replace("__", "_")
+    )
+
 
 def build_severity_dict(severity_map) -> Dict[str, int]:
     """
@@ -20,38 +32,66 @@ def build_severity_dict(severity_map) -> Dict[str, int]:
     return dict(zip(severity_map['Symptom'], severity_map['weight']))
 
 
-def encode_user_symptoms(
-    request_json: Dict[str, Any], 
+def build_feature_weights(
     feature_columns: List[str], 
     severity_lookup: Dict[str, int]
-        ) -> List[int]:
+        ) -> np.ndarray:
     """
-    Transforms a list of symptoms from a JSON request into a weighted numerical vector.
+    Aligns severity weights with the model's feature columns.
     
     Args:
-        request_json (dict): The incoming API request body.
         feature_columns (list): The list of features the model was trained on.
-        severity_lookup (dict): dictionary mapping symptom names to their severity weights.
+        severity_lookup (dict): dictionary mapping normalized symptom names to their severity weights.
     
     Returns:
-        List[int]: A numerical vector where indices correspond to feature_columns.
+        np.ndarray: A float64 array holding each feature's weight, defaulting to 1 if not found in lookup.
     """
-    # Create empty vector of zeroes
-    vector = [0] * len(feature_columns)
+    return np.array(
+        [severity_lookup.get(name, 1) for name in feature_columns],
+        dtype=np.float64
+    )
 
-    # Extract symptoms from request
-    input_symptoms = request_json.get("symptoms", [])
 
-    # Pre-build a map of feature names to their index for O(1) lookup speed
-    feature_to_idx = {name: i for i, name in enumerate(feature_columns)}
-
-    for symptom in input_symptoms:
-        # Standardize string format to match feature column naming conventions
-        clean_symptom = symptom.strip().lower().replace(" ", "_")
+def resolve_symptoms(
+    clean_symptoms: Iterable[str], 
+    feature_to_idx: Dict[str, int], 
+    feature_weights: np.ndarray
+        ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Resolves normalized symptom names to their feature indices and severity weights.
+    
+    Args:
+        clean_symptoms (iterable): Symptom names already passed through normalize_symptom.
+        feature_to_idx (dict): dictionary mapping model feature names to their column index.
+        feature_weights (np.ndarray): severity weight of each feature, aligned by column index.
+    
+    Returns:
+        Tuple[List[str], np.ndarray, np.ndarray]: The known symptom names, their int32
+        feature indices and float64 severity weights, aligned with each other.
+        Symptoms the model was not trained on are dropped.
+    """
+    known_symptoms = [symptom for symptom in clean_symptoms if symptom in feature_to_idx]
+    indices = np.array([feature_to_idx[symptom] for symptom in known_symptoms], dtype=np.int32)
+    weights = np.asarray(feature_weights[indices], dtype=np.float64)
+    return known_symptoms, indices, weights
 
-        if clean_symptom in feature_to_idx:
-            index = feature_to_idx[clean_symptom]
-            # Use the severity weight, defaulting to 1 if not found in lookup
-            vector[index] = severity_lookup.get(symptom, 1)
 
+def encode_user_symptoms(
+    indices: np.ndarray, 
+    weights: np.ndarray, 
+    n_features: int
+        ) -> np.ndarray:
+    """
+    Builds the weighted numerical vector for a set of resolved symptoms.
+    
+    Args:
+        indices (np.ndarray): Feature indices from resolve_symptoms.
+        weights (np.ndarray): Severity weights from resolve_symptoms.
+        n_features (int): The number of features the model was trained on.
+    
+    Returns:
+        np.ndarray: A float64 vector where indices correspond to the model's feature columns.
+    """
+    vector = np.zeros(n_features, dtype=np.float64)
+    vector[indices] = weights
     return vector
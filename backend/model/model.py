@@ -6,6 +6,7 @@ Description:  End-to-end training pipeline: loads data, cleans symptoms,
 """
 
 import os
+import copy
 import pandas as pd
 import numpy as np
 import pickle
@@ -13,7 +14,7 @@ from sklearn.svm import SVC
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import accuracy_score, classification_report
 
-from encoding import build_severity_dict
+from encoding import build_severity_dict, build_feature_weights, normalize_symptom
 
 # Finds the directory where THIS file lives
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -24,40 +25,32 @@ SEVERITY_PATH = os.path.join(BASE_DIR, "data", "Symptom-severity.csv")
 ARTIFACT_DIR = os.path.join(BASE_DIR, "artifacts")
 
 
-def normalize_symptom(symptom: str) -> str:
-    """Standardizes symptom strings for consistency across datasets."""
-    if not isinstance(symptom, str):
-        return ""
-    return (
-        symptom.strip()
-        .lower()
-        .replace(" ", "_")
-        .replace("__", "_")
-    )
-
-
 def clean_dataset(training_df: pd.DataFrame) -> pd.DataFrame:
     """Cleans raw data and handles specific naming inconsistencies."""
-    df = training_df.copy()
-    df[df == 'diarrhoea'] = 'diarrhea' # Specific naming inconsistency
+    df = training_df.replace('diarrhoea', 'diarrhea') # Specific naming inconsistency
     
-    # Apply normalization to symptom columns
-    for col in df.columns[1:]:  # Skip Disease
-        df[col] = (df[col].astype(str).apply(normalize_symptom))
+    # Apply normalization to symptom columns with the vectorized str accessor
+    # (same steps as normalize_symptom)
+    cols = df.columns[1:]  # Skip Disease
+    df[cols] = df[cols].fillna("").astype(str).apply(
+        lambda col: col.str.strip()
+        .str.lower()
+        .str.replace(" ", "_", regex=False)
+        .str.replace("__", "_", regex=False)
+    )
 
     return df
 
 
 def extract_all_symptoms(training_df: pd.DataFrame):
     """Extracts a unique, sorted list of all symptoms present in the dataset"""
-    symptoms = set()
-    for col in training_df.columns[1:]:
-        symptoms.update(training_df[col].unique())
-    
+    # One hashing pass over every symptom cell at once
+    values = training_df.iloc[:, 1:].to_numpy().ravel('K')
+    symptoms = pd.unique(values)
+
     # Remove any empty strings or 'nan' that might have been picked up
-    symptoms.discard("nan")
-    symptoms.discard("")
-    return sorted(list(symptoms))
+    symptoms = symptoms[(symptoms != "nan") & (symptoms != "")]
+    return sorted(symptoms.tolist())
 
 
 def build_feature_matrix(training_df, symptom_list, severity_lookup):
@@ -68,13 +61,24 @@ def build_feature_matrix(training_df, symptom_list, severity_lookup):
         X (pd.DataFrame): Severity-weighted feature matrix.
         y (pd.Series): Target labels (Diseases).
     """
-    X = pd.DataFrame(0, index=training_df.index, columns=symptom_list)
+    sym_to_col = {symptom: i for i, symptom in enumerate(symptom_list)}
+    sev_arr = np.array(
+        [severity_lookup.get(symptom, 1) for symptom in symptom_list],
+        dtype=np.int16
+    )
 
-    # Logic: Iterate through symptoms and fill the feature matrix.
-    for row_idx, row in training_df.iterrows():
-        for symptom in row[1:]:
-            if symptom in X.columns:
-                X.at[row_idx, symptom] = severity_lookup.get(symptom, 1)
+    # Logic: Resolve every symptom cell to its feature column in one pass,
+    # dropping cells (e.g. 'nan') that are not a known symptom.
+    vals = training_df.iloc[:, 1:].to_numpy()
+    col_ids = pd.Series(vals.ravel()).map(sym_to_col).to_numpy()
+    known = ~np.isnan(col_ids)
+    row_idx = np.repeat(np.arange(vals.shape[0]), vals.shape[1])[known]
+    col_idx = col_ids[known].astype(np.intp)
+
+    # Scatter the severity weights into the feature matrix in a single store
+    X_np = np.zeros((vals.shape[0], len(symptom_list)), dtype=np.int16)
+    X_np[row_idx, col_idx] = sev_arr[col_idx]
+    X = pd.DataFrame(X_np, index=training_df.index, columns=symptom_list)
 
     y = training_df["Disease"]
     return X, y
@@ -142,17 +146,40 @@ def main():
     severity_dict = build_severity_dict(severity_df)
     severity_dict = {normalize_symptom(k): v for k, v in severity_dict.items()}
     
-    # Feature Engineering
-    feature_map = extract_all_symptoms(deduped_cleaned_data)
+    # Feature Engineering (frozen, since column order is fixed by the model)
+    feature_map = tuple(extract_all_symptoms(deduped_cleaned_data))
     X, y = build_feature_matrix(deduped_cleaned_data, feature_map, severity_dict)
     
-    # Train model
-    model = train_model(X, y)
+    # Train model on a contiguous float64 matrix: libsvm only evaluates kernels
+    # in float64, and a plain ndarray keeps feature-name checks (and their
+    # warnings) out of every predict_proba call at inference time
+    model = train_model(np.ascontiguousarray(X.to_numpy(), dtype=np.float64), y)
+
+    # Precompute inference lookups so the server never rebuilds them
+    severity_weights = build_feature_weights(feature_map, severity_dict)
+
+    # Numeric arrays are stored as .npy so the server can memory-map them
+    arrays = {
+        "severity_weights.npy": severity_weights,
+        "support_vectors.npy": model.support_vectors_,
+        "dual_coef.npy": model._dual_coef_
+    }
+
+    for filename, arr in arrays.items():
+        path = os.path.join(ARTIFACT_DIR, filename)
+        np.save(path, np.ascontiguousarray(arr, dtype=np.float64))
+        print(f"Saved: {path}")
+
+    # Pickle the SVC without its kernel arrays; load_model_and_metadata
+    # restores them from the .npy files above
+    stripped_model = copy.copy(model)
+    stripped_model.support_vectors_ = np.empty((0, model.n_features_in_))
+    stripped_model._dual_coef_ = np.empty((model._dual_coef_.shape[0], 0))
+    stripped_model.dual_coef_ = np.empty((model.dual_coef_.shape[0], 0))
 
     # Persist artifacts
     artifacts = {
-        "model.pkl": model,
-        "feature_map.pkl": feature_map,
+        "model.pkl": stripped_model,
         "severity_map.pkl": severity_dict
     }
 
@@ -162,6 +189,12 @@ def main():
             pickle.dump(obj, f)
         print(f"Saved: {path}")
 
+    # The feature map is plain text, one feature per line, in column order
+    path = os.path.join(ARTIFACT_DIR, "feature_map.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(feature_map) + "\n")
+    print(f"Saved: {path}")
+
     return model
 
 
@@ -11,140 +11,235 @@ import os
 import numpy as np
 import pandas as pd
 from .encoding import encode_user_symptoms
+from ._kernels import score_impacts, couple_probabilities, rbf_loo_decisions
 
 # Define paths relative to this file
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "artifacts/model.pkl")
-FEATURE_MAP_PATH = os.path.join(BASE_DIR, "artifacts/feature_map.pkl")
+FEATURE_MAP_PATH = os.path.join(BASE_DIR, "artifacts/feature_map.txt")
 SEVERITY_PATH = os.path.join(BASE_DIR, "artifacts/severity_map.pkl")
+SEVERITY_WEIGHTS_PATH = os.path.join(BASE_DIR, "artifacts/severity_weights.npy")
+SUPPORT_VECTORS_PATH = os.path.join(BASE_DIR, "artifacts/support_vectors.npy")
+DUAL_COEF_PATH = os.path.join(BASE_DIR, "artifacts/dual_coef.npy")
+
+# libsvm clips pairwise probabilities to [MIN_PROB, 1 - MIN_PROB]
+MIN_PROB = 1e-7
 
 def load_model_and_metadata():
     """
     Loads trained SVM model and associated metadata artifacts.
+
+    Returns:
+        tuple: (model, feature_map, severity_dict, severity_weights, clean_to_idx),
+        where severity_weights and clean_to_idx are aligned with feature_map.
     """
     try:
         with open(MODEL_PATH, 'rb') as file:
             model = pickle.load(file)
-        with open(FEATURE_MAP_PATH, 'rb') as file:
-            feature_map = pickle.load(file)
+        # Expose raw pairwise decision values for the Platt scaling path
+        model.decision_function_shape = "ovo"
+
+        # The pickle carries no kernel arrays; map them from their .npy files.
+        # libsvm needs writable buffers, so map copy-on-write; it never writes,
+        # so the pages stay shared with the file (and across workers).
+        support_vectors = np.load(SUPPORT_VECTORS_PATH, mmap_mode='c')
+        dual_coef = np.load(DUAL_COEF_PATH, mmap_mode='c')
+        n_sv = int(model.n_support_.sum())
+        if support_vectors.shape != (n_sv, model.n_features_in_):
+            raise ValueError(
+                f"support_vectors.npy has shape {support_vectors.shape}, "
+                f"expected {(n_sv, model.n_features_in_)}"
+            )
+        if dual_coef.shape != (len(model.classes_) - 1, n_sv):
+            raise ValueError(
+                f"dual_coef.npy has shape {dual_coef.shape}, "
+                f"expected {(len(model.classes_) - 1, n_sv)}"
+            )
+        model.support_vectors_ = support_vectors
+        model._dual_coef_ = dual_coef
+        # Multiclass SVCs share one array for both attributes; binary ones
+        # expose the negated coefficients publicly
+        model.dual_coef_ = dual_coef if len(model.classes_) > 2 else -dual_coef
+
+        with open(FEATURE_MAP_PATH, 'r') as file:
+            feature_map = tuple(file.read().splitlines())
+        clean_to_idx = {symptom: i for i, symptom in enumerate(feature_map)}
         with open(SEVERITY_PATH, 'rb') as file:
             severity_dict = pickle.load(file)
-        return model, feature_map, severity_dict
+        severity_weights = np.load(SEVERITY_WEIGHTS_PATH, mmap_mode='r')
+        return model, feature_map, severity_dict, severity_weights, clean_to_idx
     except FileNotFoundError as e:
         print(f"Error: Missing artifact file. {e}")
         raise
 
 
-def predict_top_k_from_json(model, request_json, feature_columns, severity_table, k=5):
+def build_platt_constants(model):
+    """
+    Lays out the SVC's per-pair Platt coefficients for vectorized evaluation.
+
+    Returns:
+        tuple: (prob_a, prob_b, pair_i, pair_j) where prob_a and prob_b are
+        contiguous float64 arrays, and pair_i / pair_j are the int32 class
+        indices of each one-vs-one pair, in libsvm's pair order.
+    """
+    n_classes = len(model.classes_)
+    pair_i, pair_j = np.triu_indices(n_classes, k=1)
+    return (
+        np.ascontiguousarray(model.probA_, dtype=np.float64),
+        np.ascontiguousarray(model.probB_, dtype=np.float64),
+        pair_i.astype(np.int32),
+        pair_j.astype(np.int32)
+    )
+
+
+def build_kernel_constants(model):
+    """
+    Extracts what the leave-one-out RBF kernel needs from a fitted SVC.
+
+    Returns:
+        tuple or None: (support_vectors, dual_coef, intercept, sv_starts, gamma),
+        where the support vectors and dual coefficients are the model's own
+        (memory-mapped) arrays rather than copies. None when the model is not a
+        dense RBF SVC, in which case the contributions fall back to
+        model.decision_function.
+    """
+    if model.kernel != "rbf" or model._sparse:
+        return None
+    sv_starts = np.concatenate(([0], np.cumsum(model.n_support_))).astype(np.int64)
+    return (
+        np.ascontiguousarray(model.support_vectors_, dtype=np.float64),
+        np.ascontiguousarray(model._dual_coef_, dtype=np.float64),
+        np.ascontiguousarray(model._intercept_, dtype=np.float64),
+        sv_starts,
+        float(model._gamma)
+    )
+
+
+def probabilities_from_decisions(dec, platt_constants, n_classes):
+    """
+    Converts SVC one-vs-one decision values into class probabilities using
+    the per-pair Platt coefficients, matching model.predict_proba.
+    """
+    prob_a, prob_b, pair_i, pair_j = platt_constants
+
+    # Platt sigmoid for every (row, pair) in one fused pass; an overflowing
+    # exp yields 0, which the clip below maps to MIN_PROB as libsvm does
+    with np.errstate(over='ignore'):
+        pairwise = 1.0 / (1.0 + np.exp(dec * prob_a + prob_b))
+    np.clip(pairwise, MIN_PROB, 1 - MIN_PROB, out=pairwise)
+
+    return couple_probabilities(pairwise, pair_i, pair_j, n_classes)
+
+
+def predict_proba_from_decisions(model, X, platt_constants):
+    """
+    Equivalent of model.predict_proba(X) built from the SVC's one-vs-one
+    decision values and its per-pair Platt coefficients.
+    """
+    dec = np.ascontiguousarray(model.decision_function(X), dtype=np.float64)
+    return probabilities_from_decisions(dec, platt_constants, len(model.classes_))
+
+
+def predict_top_k(model, indices, weights, k=5):
     """
     Predicts top K diseases based on input symptoms.
+
+    Args:
+        indices (np.ndarray): Feature indices of the symptoms, from resolve_symptoms.
+        weights (np.ndarray): Severity weights of the symptoms, from resolve_symptoms.
     """
-    # Vectorize the text symptoms
-    vector = encode_user_symptoms(
-        request_json,
-        feature_columns,
-        severity_table
-        )
+    # Vectorize the resolved symptoms
+    vector = encode_user_symptoms(indices, weights, model.n_features_in_)
 
     # Get probabilities across all classes
-    probabilities = model.predict_proba([vector])[0]
+    probabilities = model.predict_proba(vector.reshape(1, -1))[0]
     classes = model.classes_
 
-    # Pair and sort diseases by probabilities
-    disease_probs = sorted(
-        zip(classes, probabilities), 
-        key=lambda x: x[1], 
-        reverse=True)
-
+    # Select the top K classes, then sort only those by probability. Every
+    # class tied with the K-th value is kept in classes_ order and the sort is
+    # stable, so ties rank exactly as a stable sort over all classes would.
+    k = min(k, len(probabilities))
+    threshold = probabilities[np.argpartition(probabilities, -k)[-k]]
+    idx = np.flatnonzero(probabilities >= threshold)
+    idx = idx[np.argsort(-probabilities[idx], kind="stable")][:k]
 
     # Format the top K results into a clean list of dictionaries
     top_k_predictions = []
 
-    for disease, probability in disease_probs[:k]:
+    for i in idx:
         top_k_predictions.append({
-            "disease": str(disease),
-            "probability": round(float(probability), 4) # Rounding to 4 places for clean UI/UX
+            "disease": str(classes[i]),
+            "probability": round(float(probabilities[i]), 4) # Rounding to 4 places for clean UI/UX
         })
 
     return top_k_predictions
 
 def calculate_symptom_contributions(
     model, 
-    request_json, 
+    symptoms, 
+    indices, 
+    weights, 
     predictions, 
-    feature_columns, 
-    severity_table
+    platt_constants,
+    kernel_constants=None
 ):
     """
     Calculates the impact of each symptom on the final predictions.
     
     Uses a 'Leave-One-Out' approach to see how much the probability 
     drops when a specific symptom is removed.
+
+    Args:
+        symptoms (list): Known symptom names, aligned with indices and weights,
+            as returned by resolve_symptoms.
     """
-    selected_symptoms = request_json.get("symptoms", [])
-    
-    # Establish the baseline (Probability with ALL symptoms present)
-    baseline_vector = encode_user_symptoms(request_json, feature_columns, severity_table)
-    baseline_probs = model.predict_proba([baseline_vector])[0]
-    
+    baseline_vector = encode_user_symptoms(indices, weights, model.n_features_in_)
+
+    # Muting a zero-weight symptom leaves the baseline unchanged, so it cannot
+    # contribute; only the remaining symptoms go through the experiment
+    active = np.flatnonzero(weights != 0)
+    active_symptoms = [symptoms[a] for a in active]
+    active_indices = indices[active]
+    active_weights = weights[active]
+
     # Map disease predictions to their indeces in the model's predictions array
     classes = model.classes_
     disease_to_idx = {disease: idx for idx, disease in enumerate(classes)}
 
-    # Map features to their indeces in features array
-    feature_to_idx = {name: i for i, name in enumerate(feature_columns)}
-    
-    # Store our raw math results temporarily
-    raw_impact_results = {}
-
-    # Analyze each disease prediction individually
-    for pred in predictions:
-        disease = pred['disease']
-        d_idx = disease_to_idx[disease]
-        baseline_prob = baseline_probs[d_idx]
-        
-        disease_scores = {}
-        
-        for symptom in selected_symptoms:
-            # We assume the symptom is already cleaned from app.jsx
-            if symptom not in feature_to_idx:
-                continue
-                
-            s_idx = feature_to_idx[symptom]
-            
-            # --- THE 'LEAVE-ONE-OUT' EXPERIMENT ---
-            # Create a copy and 'mute' this specific symptom (set to 0)
-            temp_vector = baseline_vector.copy()  
-            temp_vector[s_idx] = 0
-            
-            # Re-predict to see the impact of that omission
-            new_probs = model.predict_proba([temp_vector])[0]
-            new_prob = new_probs[d_idx]
-            
-            # Calculate impact: Difference in probability * severity weight
-            prob_drop = max(0, baseline_prob - new_prob)
-            weight = severity_table.get(symptom, 1)
-            
-            disease_scores[symptom] = prob_drop * weight
-
-        raw_impact_results[disease] = disease_scores
-
-    # --- Scaling for the UI ---
-    # Find the highest impact score to use as our 100% reference point
-    all_scores = [score for d_scores in raw_impact_results.values() for score in d_scores.values()]
-    highest_impact = max(all_scores) if all_scores else 1
+    # --- THE 'LEAVE-ONE-OUT' EXPERIMENT ---
+    # Row 0 is the baseline (ALL symptoms present); row i+1 'mutes' the i-th
+    # symptom (set to 0).
+    if kernel_constants is not None:
+        # Each variant differs from the baseline in one feature, so its RBF
+        # kernel values are a delta update of the baseline's
+        dec = rbf_loo_decisions(baseline_vector, active_indices, *kernel_constants)
+        all_probs = probabilities_from_decisions(dec, platt_constants, len(classes))
+    else:
+        # Score every variant in one batch so SVC evaluates the kernel
+        # against its support vectors in a single pass
+        batch = np.tile(baseline_vector, (len(active_symptoms) + 1, 1))
+        batch[np.arange(1, len(active_symptoms) + 1), active_indices] = 0
+        all_probs = predict_proba_from_decisions(model, batch, platt_constants)
+
+    # Score every (disease, symptom) pair and scale for the UI in one kernel call
+    disease_idx = np.array([disease_to_idx[pred['disease']] for pred in predictions], dtype=np.int64)
+    raw, scaled = score_impacts(
+        np.ascontiguousarray(all_probs[0], dtype=np.float64),
+        np.ascontiguousarray(all_probs, dtype=np.float64),
+        disease_idx,
+        np.ascontiguousarray(active_weights, dtype=np.float64)
+    )
 
     final_analysis = {}
 
-    for disease, scores in raw_impact_results.items():
-        final_analysis[disease] = {
-            symptom: {
-                'raw': round(score, 6),
-                'scaled': round((score / highest_impact) * 100, 2) if highest_impact > 0 else 0
+    for d, pred in enumerate(predictions):
+        # Skipped symptoms are reported as zero so the UI sees every symptom
+        disease_scores = {symptom: {'raw': 0.0, 'scaled': 0.0} for symptom in symptoms}
+        for s, symptom in enumerate(active_symptoms):
+            disease_scores[symptom] = {
+                'raw': round(float(raw[d, s]), 6),
+                'scaled': round(float(scaled[d, s]), 2)
             }
-            # 'score' is pulled from the 'scores' dictionary values here
-            for symptom, score in scores.items()
-        }
+        final_analysis[pred['disease']] = disease_scores
         
     return final_analysis
-
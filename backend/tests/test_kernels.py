@@ -0,0 +1,121 @@
+"""
+File:         test_kernels.py
+Author:       Noemie Florant
+Description:  Regression tests checking the hand-ported SVC inference path
+              against scikit-learn's own decision_function / predict_proba.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from backend.model._kernels import rbf_loo_decisions
+from backend.model.predict import (
+    build_kernel_constants,
+    build_platt_constants,
+    probabilities_from_decisions
+)
+
+
+N_CLASSES = 4
+N_FEATURES = 12
+
+
+@pytest.fixture(scope="module")
+def fitted_svc():
+    """A small multiclass SVC trained on integer severity-style features."""
+    rng = np.random.default_rng(0)
+    X, y = [], []
+    for label in range(N_CLASSES):
+        # Each class favours its own block of three symptoms
+        block = slice(3 * label, 3 * label + 3)
+        for _ in range(25):
+            row = np.zeros(N_FEATURES)
+            row[block] = rng.integers(0, 8, 3)
+            row[rng.integers(0, N_FEATURES)] = rng.integers(1, 8)
+            X.append(row)
+            y.append(f"disease_{label}")
+    X = np.array(X, dtype=np.float64)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        model = SVC(probability=True, random_state=0).fit(X, y)
+    model.decision_function_shape = "ovo"
+    return model, X
+
+
+def test_probabilities_from_decisions_matches_predict_proba(fitted_svc):
+    model, X = fitted_svc
+    probs = probabilities_from_decisions(
+        model.decision_function(X), build_platt_constants(model), N_CLASSES
+    )
+    np.testing.assert_allclose(probs, model.predict_proba(X), rtol=0, atol=1e-8)
+
+
+def test_probabilities_from_decisions_handles_overflowing_sigmoids(fitted_svc):
+    model, X = fitted_svc
+    # Large Platt slopes push A * dec + B far past exp's float64 range, so
+    # every pairwise probability hits the overflow and clip branch
+    original_prob_a = model._probA
+    model._probA = original_prob_a * 1e4
+    try:
+        dec = model.decision_function(X)
+        assert np.abs(dec * model.probA_ + model.probB_).max() > 710
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            probs = probabilities_from_decisions(dec, build_platt_constants(model), N_CLASSES)
+
+        np.testing.assert_allclose(probs, model.predict_proba(X), rtol=0, atol=1e-8)
+    finally:
+        model._probA = original_prob_a
+
+
+def test_rbf_loo_decisions_matches_decision_function(fitted_svc):
+    model, X = fitted_svc
+    kernel_constants = build_kernel_constants(model)
+
+    for baseline in X[::10]:
+        muted_idx = np.flatnonzero(baseline).astype(np.int32)
+
+        # The batch the kernel replaces: baseline, then one muted row per symptom
+        batch = np.tile(baseline, (muted_idx.size + 1, 1))
+        batch[np.arange(1, muted_idx.size + 1), muted_idx] = 0
+
+        dec = rbf_loo_decisions(baseline, muted_idx, *kernel_constants)
+        np.testing.assert_allclose(dec, model.decision_function(batch), rtol=0, atol=1e-10)
+
+
+def test_rbf_loo_decisions_on_worker_thread_lets_process_exit():
+    # Flask serves requests on non-main threads; a kernel launched from one
+    # must not leave the interpreter blocked at shutdown
+    script = textwrap.dedent("""
+        import threading
+        import numpy as np
+        from backend.model._kernels import rbf_loo_decisions
+
+        rng = np.random.default_rng(0)
+        support_vectors = rng.integers(0, 8, (20, 12)).astype(np.float64)
+        dual_coef = rng.standard_normal((3, 20))
+        intercept = rng.standard_normal(6)
+        sv_starts = np.array([0, 5, 10, 15, 20], dtype=np.int64)
+        baseline = support_vectors[0].copy()
+        muted_idx = np.flatnonzero(baseline).astype(np.int32)
+
+        worker = threading.Thread(target=rbf_loo_decisions, args=(
+            baseline, muted_idx, support_vectors, dual_coef, intercept, sv_starts, 0.1
+        ))
+        worker.start()
+        worker.join()
+    """)
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=repo_root, capture_output=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr.decode()